@@ -3,10 +3,12 @@ from ansible.inventory.manager import InventoryData
 from ansible.plugins.inventory import BaseInventoryPlugin
 from ansible.utils.display import Display
 
-from ipaddress import IPv6Network, IPv4Network, IPv4Address
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any, Set
-from collections import deque, Counter
+from ipaddress import IPv6Address, IPv4Network, IPv4Address
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Set, Tuple, Union
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import heapq
 
 from hcloud import Client, APIException
 from hcloud.servers.client import BoundServer
@@ -22,10 +24,16 @@ class NetworkManager:
     This class provides sequential assignment of host IPs and allows reservation
     of specific IPs (e.g., for already existing servers).
 
+    Assigned addresses are tracked in an integer bitmap, where bit n stands for
+    the address at offset n from the network address.
+
     Attributes:
         _network (IPv4Network): The IPv4 network to manage.
-        _assigned (set): Set of already assigned/reserved IPv4 addresses.
-        _ip_iter (iterator): Iterator over available host IPs.
+        _base (int): Integer value of the network address.
+        _first (int): Offset of the first usable host address.
+        _last (int): Offset of the last usable host address.
+        _bitmap (int): Bitmap of already assigned/reserved offsets.
+        _cursor (int): Offset to continue the sequential assignment from.
     """
     def __init__(self, network: str) -> None:
         """
@@ -40,16 +48,19 @@ class NetworkManager:
         self._network = IPv4Network(network)
         if self._network.version != 4:
             raise ValueError("Only IPv4 networks are supported.")
-        self._assigned = set()
-        self._ip_iter = self._host_ip_generator()
+        self._base = int(self._network.network_address)
 
-    def _host_ip_generator(self):
-        """
-        Generator for host IPs in the network, skipping reserved/assigned ones.
-        """
-        for ip in self._network.hosts():
-            if ip not in self._assigned:
-                yield ip
+        # Same host range as IPv4Network.hosts(): /31 and /32 have no
+        # network and broadcast address to skip
+        if self._network.num_addresses > 2:
+            self._first = 1
+            self._last = self._network.num_addresses - 2
+        else:
+            self._first = 0
+            self._last = self._network.num_addresses - 1
+
+        self._bitmap = 0
+        self._cursor = self._first
 
     def get_next_ip(self) -> str:
         """
@@ -61,14 +72,15 @@ class NetworkManager:
         Raises:
             RuntimeError: If no available IPs remain.
         """
-        while True:
-            try:
-                ip = next(self._ip_iter)
-            except StopIteration:
-                raise RuntimeError("No available IPs left in the network.")
-            if ip not in self._assigned:
-                self._assigned.add(ip)
-                return str(ip)
+        # Lowest clear bit at or above the cursor, found without a per-address loop
+        free = ~self._bitmap >> self._cursor
+        offset = self._cursor + (free & -free).bit_length() - 1
+        if offset > self._last:
+            raise RuntimeError("No available IPs left in the network.")
+
+        self._bitmap |= 1 << offset
+        self._cursor = offset + 1
+        return str(IPv4Address(self._base + offset))
 
     def reserve_ip(self, ip: str) -> None:
         """
@@ -80,12 +92,26 @@ class NetworkManager:
         Raises:
             ValueError: If the IP is not in the managed network or already reserved.
         """
-        ip_addr = IPv4Address(ip)
-        if ip_addr not in self._network.hosts():
+        offset = int(IPv4Address(ip)) - self._base
+        if not self._first <= offset <= self._last:
             raise ValueError(f"IP {ip} is not a valid host address in the network {self._network}")
-        if ip_addr in self._assigned:
+        mask = 1 << offset
+        if self._bitmap & mask:
             raise ValueError(f"IP {ip} is already reserved.")
-        self._assigned.add(ip_addr)
+        self._bitmap |= mask
+
+    def is_reserved(self, ip: str) -> bool:
+        """
+        Check whether a specific IP address is already assigned or reserved.
+
+        Args:
+            ip: The IPv4 address to check (as a string).
+
+        Returns:
+            True if the IP is a host address of the network and already taken.
+        """
+        offset = int(IPv4Address(ip)) - self._base
+        return self._first <= offset <= self._last and bool(self._bitmap >> offset & 1)
 
 class ValueManager:
     """
@@ -96,8 +122,11 @@ class ValueManager:
     This is useful for distributing resources (like server locations) fairly across multiple hosts.
     
     Attributes:
-        _values (List[str]): The list of available values to distribute.
-        _counts (Counter): A counter tracking how many times each value has been used.
+        _values (Tuple[str, ...]): The available values to distribute.
+        _counts (Dict[str, int]): How many times each value has been used.
+        _index (Dict[str, int]): Position of each value, used as tie-breaker in the heap.
+        _heap (List[tuple]): Min-heap of (count, index, value) entries. Entries whose count
+            no longer matches _counts are stale and skipped lazily.
     """
     
     def __init__(self, values: List[str]) -> None:
@@ -110,12 +139,15 @@ class ValueManager:
         Example:
             >>> manager = ValueManager(["fsn1", "nbg1", "hel1"])
             >>> manager._values
-            ['fsn1', 'nbg1', 'hel1']
+            ('fsn1', 'nbg1', 'hel1')
             >>> manager._counts
-            Counter({'fsn1': 0, 'nbg1': 0, 'hel1': 0})
+            {'fsn1': 0, 'nbg1': 0, 'hel1': 0}
         """
-        self._values = list(values)
-        self._counts = Counter({value: 0 for value in self._values})
+        self._values = tuple(values)
+        self._counts: Dict[str, int] = dict.fromkeys(self._values, 0)
+        self._index = {value: index for index, value in enumerate(self._values)}
+        self._heap = [(0, index, value) for index, value in enumerate(self._values)]
+        heapq.heapify(self._heap)
 
     def __repr__(self) -> str:
         """
@@ -131,7 +163,7 @@ class ValueManager:
             >>> repr(manager)
             "ValueManager(values=['fsn1', 'nbg1'], counts={'fsn1': 1, 'nbg1': 0})"
         """
-        return f"ValueManager(values={self._values}, counts={dict(self._counts)})"
+        return f"ValueManager(values={list(self._values)}, counts={self._counts})"
 
     def get_next(self) -> str:
         """
@@ -155,9 +187,14 @@ class ValueManager:
             >>> manager.get_next()  # Back to the least used
             'fsn1'
         """
-        min_value = min(self._counts.items(), key=lambda x: x[1])[0]
-        self._counts[min_value] += 1
-        return min_value
+        while True:
+            count, index, value = heapq.heappop(self._heap)
+            if count == self._counts[value]:
+                break
+
+        self._counts[value] += 1
+        heapq.heappush(self._heap, (count + 1, index, value))
+        return value
 
     def increment(self, item: str) -> None:
         """
@@ -180,10 +217,11 @@ class ValueManager:
             >>> manager.increment("unknown")  # Raises ValueError
             ValueError: Item 'unknown' not found!
         """
-        if item not in self._values:
+        if item not in self._counts:
             raise ValueError(f"Item '{item}' not found!")
         
         self._counts[item] += 1
+        heapq.heappush(self._heap, (self._counts[item], self._index[item], item))
 
 class HostTimeAssigner:
     """
@@ -191,14 +229,14 @@ class HostTimeAssigner:
     
     This class distributes time slots across a specified time window to different host groups,
     ensuring a fair distribution that minimizes the impact of maintenance operations.
-    It uses a round-robin approach to assign slots to groups based on their size.
+    Slots of each group are spread evenly over the whole window, proportional to the group size.
     
     Attributes:
         _start_time (datetime): The start time of the maintenance window.
         _end_time (datetime): The end time of the maintenance window.
         _groups (Dict[str, int]): Dictionary mapping group names to their host counts.
         _total_hosts (int): Total number of hosts across all groups.
-        _group_slots (Dict[str, List[datetime]]): Time slots assigned to each group.
+        _group_slots (Dict[str, List[str]]): Time slots in HH:MM format assigned to each group.
         _group_slot_index (Dict[str, int]): Current index for each group's slot list.
         
     Example:
@@ -208,11 +246,11 @@ class HostTimeAssigner:
         ...     "worker_big": 1
         ... }, "02:00", "03:00")
         >>> assigner.get_all_slots("control")
-        ['02:00', '02:36', '03:00']
+        ['02:00', '02:24', '03:00']
         >>> assigner.get_all_slots("worker_small")
         ['02:12', '02:48']
         >>> assigner.get_all_slots("worker_big")
-        ['02:24']
+        ['02:36']
     """
     
     def __init__(self, groups: Dict[str, int], start_time_str: str, end_time_str: str) -> None:
@@ -251,65 +289,34 @@ class HostTimeAssigner:
         if self._total_hosts == 0:
             raise ValueError("No hosts defined in any group")
             
-        self._group_slots: Dict[str, List[datetime]] = {}
+        self._group_slots: Dict[str, List[str]] = {}
         self._group_slot_index: Dict[str, int] = {}
 
         total_minutes = int((self._end_time - self._start_time).total_seconds() // 60)
         if self._total_hosts > total_minutes:
             raise ValueError(f"Not enough minutes in time window for all hosts. Need {self._total_hosts}, have {total_minutes}.")
 
-        # Generate time slots
-        if self._total_hosts <= 1:
-            all_slots = [self._start_time]
-        else:
-            step = total_minutes // (self._total_hosts - 1)
-            all_slots = [
-                self._start_time + timedelta(minutes=i * step)
-                for i in range(self._total_hosts)
-            ]
-
-        # Create fair distribution of groups
-        round_robin = self._interleave_groups(groups.copy())
-
-        # Assign slots to groups
         for group in groups:
             self._group_slots[group] = []
             self._group_slot_index[group] = 0
 
-        for slot, group in zip(all_slots, round_robin):
-            self._group_slots[group].append(slot)
+        # Every group gets a stride of total / count and its hosts are placed at
+        # the centers of those strides, so each group is spread evenly over the
+        # whole window. Sorting the relative positions (2i + 1) / count of all
+        # hosts yields the slot order; ties go to the group configured first.
+        positions = sorted(
+            ((2 * i + 1) / count, order, group)
+            for order, (group, count) in enumerate(groups.items())
+            for i in range(count)
+        )
 
-    def _interleave_groups(self, group_counts: Dict[str, int]) -> List[str]:
-        """
-        Creates a fair round-robin distribution of group names.
-        
-        This method takes a dictionary of group counts and returns a list where
-        each group appears the specified number of times, distributed as evenly
-        as possible.
-        
-        Args:
-            group_counts: Dictionary mapping group names to their counts.
-            
-        Returns:
-            List of group names in fair distribution order.
-            
-        Example:
-            >>> assigner = HostTimeAssigner({
-            ...     "control": 3,
-            ...     "worker_small": 2,
-            ...     "worker_big": 1
-            ... }, "02:00", "03:00")
-            >>> assigner._interleave_groups({"control": 3, "worker_small": 2, "worker_big": 1})
-            ['control', 'worker_small', 'worker_big', 'control', 'worker_small', 'control']
-        """
-        result = []
-        while group_counts:
-            for group in list(group_counts.keys()):
-                result.append(group)
-                group_counts[group] -= 1
-                if group_counts[group] == 0:
-                    del group_counts[group]
-        return result
+        # Assign slots as minutes since midnight in HH:MM format
+        start_minute = self._start_time.hour * 60 + self._start_time.minute
+        step = total_minutes // (self._total_hosts - 1) if self._total_hosts > 1 else 0
+        minute = start_minute
+        for _, _, group in positions:
+            self._group_slots[group].append(f"{minute // 60:02d}:{minute % 60:02d}")
+            minute += step
 
     def get_next_slot(self, group_name: str) -> str:
         """
@@ -335,9 +342,9 @@ class HostTimeAssigner:
             >>> assigner.get_next_slot("worker_small")
             '02:12'
             >>> assigner.get_next_slot("worker_big")
-            '02:24'
-            >>> assigner.get_next_slot("control")
             '02:36'
+            >>> assigner.get_next_slot("control")
+            '02:24'
             >>> assigner.get_next_slot("worker_small")
             '02:48'
             >>> assigner.get_next_slot("control")
@@ -350,9 +357,8 @@ class HostTimeAssigner:
         if idx >= len(self._group_slots[group_name]):
             raise ValueError(f"All slots for group '{group_name}' have been assigned.")
 
-        slot = self._group_slots[group_name][idx]
         self._group_slot_index[group_name] += 1
-        return slot.strftime("%H:%M")
+        return self._group_slots[group_name][idx]
     
     def get_all_slots(self, group_name: str) -> List[str]:
         """
@@ -374,16 +380,16 @@ class HostTimeAssigner:
             ...     "worker_big": 1
             ... }, "02:00", "03:00")
             >>> assigner.get_all_slots("control")
-            ['02:00', '02:36', '03:00']
+            ['02:00', '02:24', '03:00']
             >>> assigner.get_all_slots("worker_small")
             ['02:12', '02:48']
             >>> assigner.get_all_slots("worker_big")
-            ['02:24']
+            ['02:36']
         """
         if group_name not in self._group_slots:
             raise ValueError(f"Unknown group: {group_name}")
             
-        return [slot.strftime("%H:%M") for slot in self._group_slots[group_name]]
+        return list(self._group_slots[group_name])
 
 class InventoryModule(BaseInventoryPlugin):
     """
@@ -403,13 +409,18 @@ class InventoryModule(BaseInventoryPlugin):
     
     Attributes:
         NAME (str): The name of the inventory plugin.
-        _hetzner_servers_configured (List[int]): List of Hetzner server IDs that are still
+        _hetzner_servers_configured (Set[int]): Set of Hetzner server IDs that are still
             managed by this script and should not be deleted during cleanup operations.
-        _hetzner_volumes_configured (List[str]): Track managed volume names
         _hcloud_servers (List[BoundServer]): List of Hetzner Cloud server objects.
         _hcloud_volumes (List[BoundVolume]): List of Hetzner Cloud volume objects.
+        _servers_by_name (Dict[str, BoundServer]): Hetzner Cloud servers indexed by name.
+        _server_internal_ips (List[Tuple[str, str]]): (internal_ip, server name) of all servers with an internal_ip label.
+        _volumes_by_name (Dict[str, BoundVolume]): Hetzner Cloud volumes indexed by name.
+        _unclaimed_volumes (Dict[str, BoundVolume]): Hetzner Cloud volumes not claimed by any configured host yet.
         _inventory (InventoryData): Ansible inventory object.
         _config (Dict[str, Any]): Configuration data from the inventory file.
+        _config_cache (Dict[Union[str, Tuple[str, ...]], Any]): Resolved configuration values by key.
+        _parsed_volumes (List[Tuple[str, Any, int]]): (name, size, size in GB) of volumes configured for storage hosts.
         _host_time_assigner (HostTimeAssigner): Assigner for maintenance windows.
         _network_manager (NetworkManager): Manager for private network.
     """
@@ -422,13 +433,18 @@ class InventoryModule(BaseInventoryPlugin):
 
     def __init__(self) -> None:
         """Initialize the inventory plugin."""
-        super(InventoryModule, self).__init__()
-        self._hetzner_servers_configured: List[int] = []
-        self._hetzner_volumes_configured: List[str] = []
+        super().__init__()
+        self._hetzner_servers_configured: Set[int] = set()
         self._hcloud_servers: List[BoundServer] = []
         self._hcloud_volumes: List[BoundVolume] = []
+        self._servers_by_name: Dict[str, BoundServer] = {}
+        self._server_internal_ips: List[Tuple[str, str]] = []
+        self._volumes_by_name: Dict[str, BoundVolume] = {}
+        self._unclaimed_volumes: Dict[str, BoundVolume] = {}
         self._inventory: InventoryData
         self._config: Dict[str, Any]
+        self._config_cache: Dict[Union[str, Tuple[str, ...]], Any] = {}
+        self._parsed_volumes: List[Tuple[str, Any, int]] = []
         self._host_time_assigner: HostTimeAssigner
         self._network_manager: NetworkManager
 
@@ -436,18 +452,19 @@ class InventoryModule(BaseInventoryPlugin):
     # Configuration Management #
     ############################
 
-    def _get_config(self, key: str, default: Any = None, config: Optional[Dict[str, Any]] = None, initial_key: Optional[str] = None) -> Any:
+    def _get_config(self, key: Union[str, Tuple[str, ...]], default: Any = None) -> Any:
         """
         Get configuration value using dot notation for nested keys.
         
         This method allows accessing nested configuration values using dot notation.
         For example, "nodes.control.type" will return the server type for the control group.
+        The key may also be given as a tuple of already split parts.
+        Resolved values are memoized in self._config_cache, so repeated lookups of the
+        same key don't walk the configuration again.
         
         Args:
-            key: Configuration key, can use dot notation for nested keys.
+            key: Configuration key, can use dot notation for nested keys or be a tuple of parts.
             default: Default value if key not found.
-            config: Optional config dict to search in (defaults to self._config).
-            initial_key: For internal recursion.
             
         Returns:
             Configuration value or default.
@@ -458,22 +475,21 @@ class InventoryModule(BaseInventoryPlugin):
             'cx21'
             >>> self._get_config("nodes.worker.type", "cx11")
             'cx11'
+            >>> self._get_config(("nodes", "control", "type"))
+            'cx21'
         """
-        config = self._config if config is None else config
-        initial_key = key if initial_key is None else initial_key
-        
-        keys = []
-        if "." in key:
-            keys = key.split(".")
-            key = keys.pop(0)
-            
-        if key not in config:
-            return default
-        
-        if keys:
-            return self._get_config(key=".".join(keys), default=default, config=config[key], initial_key=initial_key)
+        if key in self._config_cache:
+            value = self._config_cache[key]
         else:
-            return default if config[key] is None else config[key]
+            value = self._config
+            for part in key.split(".") if isinstance(key, str) else key:
+                if not isinstance(value, dict) or part not in value:
+                    value = None
+                    break
+                value = value[part]
+            self._config_cache[key] = value
+
+        return default if value is None else value
 
     def _get_group_config(self, group: str, key: str, default: Any = None) -> Any:
         """
@@ -496,7 +512,7 @@ class InventoryModule(BaseInventoryPlugin):
             >>> self.get_group_config("worker", "type", "cx11")
             'cx11'
         """
-        return self._get_config(key=f"nodes.{group}.{key}", default=default)
+        return self._get_config(key=("nodes", group, key), default=default)
 
     ############################
     # Hetzner Cloud Management #
@@ -507,7 +523,8 @@ class InventoryModule(BaseInventoryPlugin):
         Load server data from Hetzner Cloud API.
         
         This method authenticates with the Hetzner Cloud API and retrieves
-        all servers associated with the account.
+        all servers and volumes associated with the account. Both requests
+        are I/O bound and are issued concurrently.
         
         Raises:
             AnsibleError: If API token is missing or API request fails.
@@ -522,11 +539,25 @@ class InventoryModule(BaseInventoryPlugin):
         )
 
         try:
-            self._hcloud_servers = client.servers.get_all()
-            self._hcloud_volumes = client.volumes.get_all()
+            with ThreadPoolExecutor(max_workers=2) as executor:
+                servers = executor.submit(client.servers.get_all)
+                volumes = executor.submit(client.volumes.get_all)
+                self._hcloud_servers = servers.result()
+                self._hcloud_volumes = volumes.result()
         except APIException as exception:
             raise AnsibleError(f"[hcloud] Error requesting Hetzner Cloud API: {exception}") from exception
 
+        # Index servers and collect their internal IPs in a single pass
+        self._servers_by_name = {}
+        self._server_internal_ips = []
+        for server in self._hcloud_servers:
+            self._servers_by_name[server.name] = server
+            internal_ip = server.labels.get("internal_ip")
+            if internal_ip:
+                self._server_internal_ips.append((internal_ip, server.name))
+
+        self._volumes_by_name = {volume.name: volume for volume in self._hcloud_volumes}
+
     def _get_current_ip(self, server: BoundServer) -> str:
         """
         Get the current IP address for a server.
@@ -546,8 +577,11 @@ class InventoryModule(BaseInventoryPlugin):
         if server.public_net.primary_ipv4 is not None:
             return server.public_net.primary_ipv4.ip
         elif server.public_net.primary_ipv6 is not None:
-            network = IPv6Network(server.public_net.primary_ipv6.ip)
-            return network[1].compressed
+            # First host of the assigned network, e.g. 2001:db8::/64 -> 2001:db8::1
+            address, _, prefix = server.public_net.primary_ipv6.ip.partition("/")
+            host_bits = 128 - int(prefix or 128)
+            network = int(IPv6Address(address)) >> host_bits << host_bits
+            return IPv6Address(network + 1).compressed
         else:
             raise AnsibleError(f"Server {server.name} has no primary network configured!")
 
@@ -571,7 +605,7 @@ class InventoryModule(BaseInventoryPlugin):
             return False
         if not filename.endswith(".cluster.yml"):
             return False
-        return super(InventoryModule, self).verify_file(path)
+        return super().verify_file(path)
 
     def parse(self, inventory: InventoryData, loader: Any, path: str, cache: bool = True) -> None:
         """
@@ -591,11 +625,13 @@ class InventoryModule(BaseInventoryPlugin):
             AnsibleError: If required groups are missing or configuration is invalid.
         """
         # Call base method to ensure properties are available
-        super(InventoryModule, self).parse(inventory, loader, path, cache)
+        super().parse(inventory, loader, path, cache)
 
         # Prepare necessary data
         self._config = self._read_config_data(path)
+        self._config_cache = {}
         self._validate_config_structure(self._config)
+        self._parsed_volumes = self._parse_volumes()
 
         # Now load Hetzner data for logic validation
         self._load_hcloud_data()
@@ -627,23 +663,18 @@ class InventoryModule(BaseInventoryPlugin):
         Returns:
             Matching server or None if not found.
         """
-        for server in self._hcloud_servers:
-            if server.name == name:
-                current_image = server.labels.get("image")
-                current_type = server.labels.get("server_type")
-                current_is_control = server.labels.get("is_control")
-                current_is_worker = server.labels.get("is_worker")
-                internal_ip = server.labels.get("internal_ip")
-
-                is_delete_control = current_is_control == "true" and not is_control
-                is_delete_worker = current_is_worker == "true" and not is_worker
-
-                if (current_image == image and 
-                    current_type == server_type and 
-                    not is_delete_control and 
-                    not is_delete_worker and
-                    internal_ip):
-                    return server
+        server = self._servers_by_name.get(name)
+        if server is None:
+            return None
+
+        # A server can't be reused if it would lose its control or worker role
+        labels = server.labels
+        if (labels.get("image") == image and 
+            labels.get("server_type") == server_type and 
+            (is_control or labels.get("is_control") != "true") and 
+            (is_worker or labels.get("is_worker") != "true") and
+            labels.get("internal_ip")):
+            return server
         return None
 
     def _validate_config_structure(self, config: dict) -> None:
@@ -665,17 +696,16 @@ class InventoryModule(BaseInventoryPlugin):
             is_worker = self._get_group_config(group, "is_worker")
             if not (is_control or is_worker):
                 raise AnsibleError(f"Node group '{group}' must have at least one of 'is_control' or 'is_worker' set to true.")
+            if not self._get_group_config(group, "type"):
+                raise AnsibleError(f"Node group '{group}' missing required key: 'type'.")
+            num = self._get_group_config(group, "num")
+            if num is None:
+                raise AnsibleError(f"Node group '{group}' missing required key: 'num'.")
             if is_control:
                 has_control = True
-                num = self._get_group_config(group, "num")
-                if num is not None:
-                    control_count += int(num)
+                control_count += int(num)
             if is_worker:
                 has_worker = True
-            if not self._get_group_config(group, "type"):
-                raise AnsibleError(f"Node group '{group}' missing required key: 'type'.")
-            if self._get_group_config(group, "num") is None:
-                raise AnsibleError(f"Node group '{group}' missing required key: 'num'.")
         if not has_control:
             raise AnsibleError("At least one node group must have 'is_control: true'.")
         if not has_worker:
@@ -695,30 +725,44 @@ class InventoryModule(BaseInventoryPlugin):
             if "size" not in v or not v["size"]:
                 raise AnsibleError("Each volume must have a 'size' field.")
 
+    def _parse_volumes(self) -> List[Tuple[str, Any, int]]:
+        """
+        Parse the configured volumes once, including their size in GB.
+        
+        Returns:
+            List of (name, size, size in GB) tuples, where size is the configured value (e.g. '20G').
+            
+        Raises:
+            AnsibleError: If a volume size can't be parsed.
+        """
+        parsed = []
+        for v in self._get_config("volumes", []):
+            try:
+                config_gb = int(str(v["size"]).rstrip("Gg"))
+            except ValueError:
+                raise AnsibleError(f"Invalid size for volume '{v['name']}': {v['size']}")
+            parsed.append((v["name"], v["size"], config_gb))
+        return parsed
+
     def _validate_config_logic(self, config: dict) -> None:
         """
         Validate logical constraints in the configuration that require external data (e.g., Hetzner state).
         Raises AnsibleError if any logical error is found.
         """
-        volumes = self._get_config("volumes", [])
-        for group in self._get_config("nodes"):
-            if self._get_group_config(group, "storage", False):
-                num_hosts = self._get_group_config(group, "num", 0)
-                for host in range(1, num_hosts + 1):
-                    hostname = f"{group.replace('_', '-')}-{host}"
-                    for v in volumes:
-                        vol_name = v["name"]
-                        vol_size = v["size"]
-                        expected_name = f"{hostname}_{vol_name}"
-                        matched = None
-                        for hv in getattr(self, '_hcloud_volumes', []):
-                            if hv.name == expected_name:
-                                matched = hv
-                                break
-                        if matched:
-                            config_gb = int(str(vol_size).rstrip("Gg"))
-                            if config_gb < matched.size:
-                                raise AnsibleError(f"Volume shrinking is not supported: {expected_name} (configured: {config_gb}G, current: {matched.size}G)")
+        if not self._parsed_volumes or not self._volumes_by_name:
+            return
+
+        storage_groups = [group for group in self._get_config("nodes") if self._get_group_config(group, "storage", False)]
+        for group in storage_groups:
+            num_hosts = self._get_group_config(group, "num", 0)
+            host_base = group.replace('_', '-')
+            for host in range(1, num_hosts + 1):
+                prefix = f"{host_base}-{host}_"
+                for vol_name, _, config_gb in self._parsed_volumes:
+                    expected_name = prefix + vol_name
+                    matched = self._volumes_by_name.get(expected_name)
+                    if matched and config_gb < matched.size:
+                        raise AnsibleError(f"Volume shrinking is not supported: {expected_name} (configured: {config_gb}G, current: {matched.size}G)")
             
     def _initialize_inventory(self) -> None:
         """
@@ -743,18 +787,19 @@ class InventoryModule(BaseInventoryPlugin):
         # Initialize time assigner
         self._init_host_time_assigner()
 
+        # Every volume claimed by a host is removed, the rest are orphans
+        self._unclaimed_volumes = dict(self._volumes_by_name)
+
         # Initialize private network manager
         self._network_manager = NetworkManager(self._get_config("network.private_cidr", "10.0.0.0/24"))
 
         # Reserve all internal_ip labels from existing servers
-        for server in self._hcloud_servers:
-            internal_ip = server.labels.get("internal_ip")
-            if internal_ip:
-                try:
-                    self._network_manager.reserve_ip(internal_ip)
-                except ValueError as e:
-                    # Log or raise as appropriate; here we raise for safety
-                    raise AnsibleError(f"Failed to reserve internal_ip {internal_ip} for server {server.name}: {e}")
+        for internal_ip, server_name in self._server_internal_ips:
+            try:
+                self._network_manager.reserve_ip(internal_ip)
+            except ValueError as e:
+                # Log or raise as appropriate; here we raise for safety
+                raise AnsibleError(f"Failed to reserve internal_ip {internal_ip} for server {server_name}: {e}")
 
         # Process each group
         for group in self._get_config("nodes"):
@@ -798,31 +843,34 @@ class InventoryModule(BaseInventoryPlugin):
         managed by this inventory plugin and adds them to the "unmanaged"
         group with a "remove-" prefix to their name.
         """
+        inventory = self._inventory
+        set_variable = inventory.set_variable
+        configured = self._hetzner_servers_configured
         for server in self._hcloud_servers:
-            if server.id not in self._hetzner_servers_configured:
+            if server.id not in configured:
                 # Server is not managed by us (anymore?)
                 new_name = f"remove-{server.name}" if not server.name.startswith("remove-") else server.name
                 internal_name = server.name.replace("remove-", "")
-                is_managed = server.labels.get("managed") == "cluster"
-                is_control = server.labels.get("is_control") == "true"
+                labels = server.labels
+                is_managed = labels.get("managed") == "cluster"
+                is_control = labels.get("is_control") == "true"
 
-                self._inventory.add_host(new_name, "all")
+                inventory.add_host(new_name, "all")
 
-                internal_ip = server.labels.get("internal_ip")
-                self._inventory.set_variable(new_name, "internal_ip", internal_ip)
-                self._inventory.set_variable(new_name, "internal_name", internal_name)
-                self._inventory.set_variable(new_name, "etcd_name", f"{internal_name}-{server.id}")
-                self._inventory.set_variable(new_name, "state", "remove")
-                self._inventory.set_variable(new_name, "hetzner_id", server.id)
-                self._inventory.set_variable(new_name, "ansible_host", self._get_current_ip(server))
-                self._inventory.set_variable(new_name, "managed", is_managed)
+                set_variable(new_name, "internal_ip", labels.get("internal_ip"))
+                set_variable(new_name, "internal_name", internal_name)
+                set_variable(new_name, "etcd_name", f"{internal_name}-{server.id}")
+                set_variable(new_name, "state", "remove")
+                set_variable(new_name, "hetzner_id", server.id)
+                set_variable(new_name, "ansible_host", self._get_current_ip(server))
+                set_variable(new_name, "managed", is_managed)
 
                 if is_managed:
-                    self._inventory.add_child("_managed", new_name)
+                    inventory.add_child("_managed", new_name)
                     if is_control:
-                        self._inventory.add_child("_control", new_name)
+                        inventory.add_child("_control", new_name)
                 else:
-                    self._inventory.add_child("_remove", new_name)
+                    inventory.add_child("_remove", new_name)
 
     def _prepare_group(self, group: str) -> None:
         """
@@ -867,10 +915,11 @@ class InventoryModule(BaseInventoryPlugin):
         locations = self._get_group_config(group, "locations", ["fsn1", "nbg1", "hel1"])
         location_manager = ValueManager(locations)
 
+        host_base = group.replace('_', '-')
         for host in range(1, num_hosts + 1):
-            self._add_host(group, host, location_manager, server_type, image, is_control, is_worker)
+            self._add_host(group, host_base, host, location_manager, server_type, image, is_control, is_worker, has_storage)
 
-    def _add_host(self, group: str, host: int, location_manager: ValueManager, server_type: str, image: str, is_control: bool, is_worker: bool) -> None:
+    def _add_host(self, group: str, host_base: str, host: int, location_manager: ValueManager, server_type: str, image: str, is_control: bool, is_worker: bool, has_storage: bool) -> None:
         """
         Add a host to the inventory with its configuration.
         
@@ -880,73 +929,60 @@ class InventoryModule(BaseInventoryPlugin):
         
         Args:
             group: Group name.
+            host_base: Group name as used in hostnames (underscores replaced by dashes).
             host: Host number.
             location_manager: Manager for location distribution.
             server_type: Server type.
             image: Server image.
             is_control: Whether host is part of control plane.
             is_worker: Whether host is part of worker nodes.
+            has_storage: Whether host is responsible for storage volumes.
         """
-        hostname = f"{group.replace('_', '-')}-{host}"
+        hostname = f"{host_base}-{host}"
         found_server = self._search_fitting_server(hostname, server_type, image, is_control, is_worker)
 
-        # Set server as configured
         if found_server is not None:
-            self._hetzner_servers_configured.append(found_server.id)
+            # Set server as configured and reuse its location and internal_ip
+            self._hetzner_servers_configured.add(found_server.id)
 
-        # Assign location
-        if found_server is not None:
-            location = found_server.labels.get("location")
+            labels = found_server.labels
+            location = labels.get("location")
             location_manager.increment(location)
-        else:
-            location = location_manager.get_next()
 
-        # Assign internal_ip
-        if found_server is not None:
-            internal_ip = found_server.labels["internal_ip"]
+            internal_ip = labels["internal_ip"]
             # Already reserved in _initialize_inventory, but double-check
-            try:
+            if not self._network_manager.is_reserved(internal_ip):
                 self._network_manager.reserve_ip(internal_ip)
-            except ValueError:
-                pass  # Already reserved, ignore
+
+            state = "use"
+            server_vars = {
+                "etcd_name": f"{hostname}-{found_server.id}",
+                "ansible_host": self._get_current_ip(found_server),
+            }
         else:
+            location = location_manager.get_next()
             internal_ip = self._network_manager.get_next_ip()
+            state = "create"
+            server_vars = {}
+
+        # Collect host variables and hand them to the inventory at the end
+        host_vars = {
+            "state": state,
+            "location": location,
+            "internal_ip": internal_ip,
+            "internal_name": hostname,
+            "upgrade_time": self._host_time_assigner.get_next_slot(group),
+            **server_vars,
+        }
 
-        self._inventory.add_host(hostname, group)
-        self._inventory.set_variable(hostname, "state", 'create' if found_server is None else 'use')
-        self._inventory.set_variable(hostname, "location", location)
-        self._inventory.set_variable(hostname, "internal_ip", internal_ip)
-        self._inventory.set_variable(hostname, "internal_name", hostname)
-        self._inventory.set_variable(hostname, "upgrade_time", self._host_time_assigner.get_next_slot(group))
-
-        # Set etcd_name
-        if found_server:
-            self._inventory.set_variable(hostname, "etcd_name", f"{hostname}-{found_server.id}")
-
-        # Set ansible host
-        if found_server is not None:
-            self._inventory.set_variable(hostname, "ansible_host", self._get_current_ip(found_server))
-
-        # Set fitting meta group
-        self._inventory.add_child("_managed", hostname)
-        if is_control:
-            self._inventory.add_child("_control", hostname)
-
-        # Set cluster_volumes if this group is responsible for storage
-        if self._get_group_config(group, "storage", False):
-            config_volumes = self._get_config("volumes", [])
+        # Set cluster_volumes if this group is responsible for storage and volumes are configured
+        if has_storage and self._parsed_volumes:
             host_volumes = []
-            for v in config_volumes:
-                vol_name = v["name"]
-                vol_size = v["size"]
-                expected_name = f"{hostname}_{vol_name}"
-                matched = None
-                for hv in self._hcloud_volumes:
-                    if hv.name == expected_name:
-                        matched = hv
-                        break
-                # Track managed volume names
-                self._hetzner_volumes_configured.append(expected_name)
+            prefix = f"{hostname}_"
+            for vol_name, vol_size, config_gb in self._parsed_volumes:
+                expected_name = prefix + vol_name
+                # Claim the volume, so it isn't treated as orphaned
+                matched = self._unclaimed_volumes.pop(expected_name, None)
                 entry = {
                     "name": vol_name,
                     "size": vol_size,
@@ -956,26 +992,32 @@ class InventoryModule(BaseInventoryPlugin):
                 }
                 if matched:
                     # Compare size (Hetzner size is in GB as int)
-                    # Config size may be '10G', '20G', etc.
-                    config_gb = int(str(vol_size).rstrip("Gg"))
                     if matched.size != config_gb:
                         entry["needs_resize"] = True
                 host_volumes.append(entry)
-            self._inventory.set_variable(hostname, "cluster_volumes", host_volumes)
+            host_vars["cluster_volumes"] = host_volumes
+
+        inventory = self._inventory
+        inventory.add_host(hostname, group)
+        set_variable = inventory.set_variable
+        for key, value in host_vars.items():
+            set_variable(hostname, key, value)
+
+        # Set fitting meta group
+        inventory.add_child("_managed", hostname)
+        if is_control:
+            inventory.add_child("_control", hostname)
 
     def _set_orphan_volumes_for_cleanup(self) -> None:
         """
         Identify orphaned (unmanaged) volumes and set them as a variable for all hosts.
         This allows cleanup roles to access and remove volumes not managed by the current config.
         """
-        managed_set = set(self._hetzner_volumes_configured)
-        orphan_vols = []
-        for hv in self._hcloud_volumes:
-            if hv.name not in managed_set:
-                orphan_vols.append({
-                    "id": hv.id,
-                    "name": hv.name,
-                    "size": hv.size
-                })
-        if orphan_vols:
-            self._inventory.set_variable("all", "orphan_volumes", orphan_vols)
\ No newline at end of file
+        if not self._unclaimed_volumes:
+            return
+
+        orphan_vols = [
+            {"id": hv.id, "name": hv.name, "size": hv.size}
+            for hv in self._unclaimed_volumes.values()
+        ]
+        self._inventory.set_variable("all", "orphan_volumes", orphan_vols)
\ No newline at end of file